@@ -1,21 +1,117 @@
 import os
-import glob
+import functools
+import hashlib
+import itertools
+import shutil
 import subprocess
 import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
 from pathlib import Path
 from datetime import datetime
 from PIL import Image
 from PIL.ExifTags import TAGS
 
 
-def get_exif_datetime(image_path):
+@functools.lru_cache(maxsize=None)
+def _available_encoders():
     """
-    Return the EXIF DateTimeOriginal as a datetime object if available,
-    otherwise fallback to file's last modification time.
+    Probe the local ffmpeg once for the set of encoder names it supports.
+    Returns an empty set when ffmpeg is missing or the probe fails, which
+    makes every hardware-encoder lookup fall back to libx264.
     """
     try:
-        img = Image.open(image_path)
-        exif_data = img._getexif()
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return frozenset()
+    names = set()
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        # Encoder lines look like " V....D libx264   H.264 / ..."
+        if len(parts) >= 2 and parts[0].startswith("V"):
+            names.add(parts[1])
+    return frozenset(names)
+
+
+def _final_encode_args(final_threads, hw_encoder=None, x264_preset="medium",
+                       crf=20, x264_params=None):
+    """
+    Return (extra_filter, codec_args) for the final slideshow encode.
+    extra_filter is appended to the filter graph before mapping (VAAPI needs
+    an upload step); codec_args replace the software libx264 arguments.
+    hw_encoder is one of None/"none"/"auto"/"vaapi"/"nvenc"/"qsv"; anything
+    unavailable falls back to libx264 at x264_preset/crf. final_threads=None
+    lets libx264 pick its own (frame-based) thread count; x264_params
+    overrides the default -x264-params string entirely.
+    """
+    if hw_encoder and hw_encoder != "none":
+        available = _available_encoders()
+        candidates = (
+            ["nvenc", "qsv", "vaapi"] if hw_encoder == "auto" else [hw_encoder]
+        )
+        # +faststart moves the moov atom up front so the file can be
+        # streamed without a second mux pass; it applies to every encoder.
+        mux_args = ["-movflags", "+faststart"]
+        for name in candidates:
+            if name == "nvenc" and "h264_nvenc" in available:
+                return "", ["-c:v", "h264_nvenc", "-preset", "p5", "-cq", "23"] + mux_args
+            if name == "qsv" and "h264_qsv" in available:
+                return "", ["-c:v", "h264_qsv", "-global_quality", "23"] + mux_args
+            if name == "vaapi" and "h264_vaapi" in available:
+                return "format=nv12,hwupload", [
+                    "-vaapi_device", "/dev/dri/renderD128",
+                    "-c:v", "h264_vaapi", "-qp", "23"
+                ] + mux_args
+        if hw_encoder != "auto":
+            print(f"Hardware encoder '{hw_encoder}' not available, falling back to libx264")
+
+    if x264_params is None:
+        # Frame-based threading (sliced-threads=0) throughputs better than
+        # slice threading for offline encodes; a deeper lookahead keeps the
+        # frame threads fed.
+        thread_count = "auto" if final_threads is None else str(final_threads)
+        x264_params = (
+            f"threads={thread_count}:sliced-threads=0:"
+            "lookahead-threads=2:rc-lookahead=40"
+        )
+    return "", [
+        "-c:v", "libx264",
+        "-pix_fmt", "yuv420p",
+        # Near-static content is exactly what -tune stillimage targets.
+        "-preset", x264_preset,
+        "-tune", "stillimage",
+        "-crf", str(crf),
+        "-threads", "0" if final_threads is None else str(final_threads),
+        "-x264-params", x264_params,
+        "-movflags", "+faststart",
+    ]
+
+
+def _ffmpeg_threads_per_invocation(n_workers):
+    """
+    Threads to give each of n_workers concurrent ffmpeg processes so that
+    workers x threads roughly matches the CPU count. libx264 defaults to
+    ~cpu_count threads per process, which oversubscribes the machine as
+    soon as more than one encode runs at a time.
+    """
+    return max(1, (os.cpu_count() or n_workers) // n_workers)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_exif_datetime_cached(image_path, mtime):
+    """
+    EXIF lookup body for get_exif_datetime, memoized on (path, mtime) so a
+    file is only parsed once per run unless it changes on disk.
+    """
+    try:
+        # Image.open only reads the header, not the pixel data; the context
+        # manager releases the file descriptor as soon as EXIF is extracted.
+        with Image.open(image_path) as img:
+            exif_data = img._getexif()
         if exif_data:
             for tag_id, value in exif_data.items():
                 tag = TAGS.get(tag_id, tag_id)
@@ -25,10 +121,17 @@ def get_exif_datetime(image_path):
     except:
         pass
     # Fallback: file modification time
-    mtime = os.path.getmtime(image_path)
     return datetime.fromtimestamp(mtime)
 
 
+def get_exif_datetime(image_path):
+    """
+    Return the EXIF DateTimeOriginal as a datetime object if available,
+    otherwise fallback to file's last modification time.
+    """
+    return _get_exif_datetime_cached(image_path, os.path.getmtime(image_path))
+
+
 def get_image_file_list(images_dir, order_file=None):
     """
     1. If order_file is provided, read filenames in that order.
@@ -37,26 +140,44 @@ def get_image_file_list(images_dir, order_file=None):
     if order_file and os.path.exists(order_file):
         with open(order_file, "r", encoding="utf-8") as f:
             names = [line.strip() for line in f if line.strip()]
-        file_paths = [os.path.join(images_dir, name) for name in names]
-        file_paths = [fp for fp in file_paths if os.path.exists(fp)]
+        # One directory scan instead of a stat per listed name; on network
+        # mounts each of those stats can cost milliseconds.
+        with os.scandir(images_dir) as it:
+            existing = {entry.name for entry in it if entry.is_file()}
+        for name in names:
+            if name not in existing:
+                print(f"Warning: '{name}' from {order_file} not found in {images_dir}, skipping")
+        file_paths = [
+            os.path.join(images_dir, name) for name in names if name in existing
+        ]
     else:
-        # Gather all JPG/PNG
-        exts = ["*.jpg", "*.jpeg", "*.png"]
-        file_paths = []
-        for ext in exts:
-            file_paths.extend(glob.glob(os.path.join(images_dir, ext)))
-        # Sort by EXIF or mod time
-        file_paths.sort(key=lambda fp: get_exif_datetime(fp))
+        # Gather all JPG/PNG in a single directory scan. DirEntry.is_file()
+        # reuses the stat data from the scan itself, so this is one pass and
+        # one syscall per entry versus three full glob walks.
+        with os.scandir(images_dir) as it:
+            file_paths = [
+                entry.path for entry in it
+                if entry.is_file()
+                and entry.name.lower().endswith((".jpg", ".jpeg", ".png"))
+            ]
+        # Sort by EXIF or mod time. The datetimes are prefetched with a
+        # thread pool first: each lookup is a stat plus a small header read,
+        # both of which release the GIL, so threads overlap the I/O nicely.
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            dts = list(executor.map(get_exif_datetime, file_paths))
+        file_paths = [fp for _, fp in sorted(zip(dts, file_paths))]
     return file_paths
 
 
+@functools.lru_cache(maxsize=8)
 def build_ken_burns_filter(
     duration, fps, start_zoom, end_zoom, border_size, border_color,
     slideshow_width, slideshow_height
 ):
     """
     Build a filter string for Ken Burns (zoompan) from start_zoom to end_zoom,
-    plus optional border/pad.
+    plus optional border/pad. A slideshow only ever uses two argument tuples
+    (zoom in / zoom out), so the result is memoized.
       - duration : per-image duration (seconds)
       - fps      : frames per second
       - start_zoom, end_zoom : e.g. (1.0, zoom_factor) or (zoom_factor, 1.0)
@@ -64,14 +185,20 @@ def build_ken_burns_filter(
       - slideshow_width, slideshow_height : final output resolution
     """
     total_frames = int(duration * fps)
-    
-    # Zoom expression: from start_zoom to end_zoom across total_frames
-    # 'on' is the current frame index in zoompan (0..d-1).
-    zoom_expr = f"'{start_zoom} + ({end_zoom} - {start_zoom})*(on/{total_frames})'"
-    
-    # Keep image centered horizontally & vertically.
-    x_expr = "'iw/2 - (iw/zoom/2)'"
-    y_expr = "'ih/2 - (ih/zoom/2)'"
+
+    # Zoom expression: from start_zoom to end_zoom across total_frames.
+    # 'on' is the current frame index in zoompan (0..d-1), so dividing by
+    # d-1 makes the ramp actually reach end_zoom on the last frame. The
+    # slope is folded here in Python, leaving libavfilter's per-frame
+    # interpreter a single multiply-add instead of a sub, div and mul.
+    ramp_den = max(1, total_frames - 1)
+    slope = (end_zoom - start_zoom) / ramp_den
+    zoom_expr = f"'{start_zoom:.6f}{slope:+.9f}*on'"
+
+    # Keep image centered horizontally & vertically. (iw-iw/zoom)/2 is the
+    # same center as iw/2-(iw/zoom/2) with one division fewer per frame.
+    x_expr = "'(iw - iw/zoom)/2'"
+    y_expr = "'(ih - ih/zoom)/2'"
     
     # If we want a border inside a slideshow_width x slideshow_height frame:
     inner_w = slideshow_width - 2 * border_size
@@ -94,96 +221,451 @@ def build_ken_burns_filter(
         return zoompan_part
 
 
+def _segment_encode_cmd(
+    i, img_path, seg_path, duration_per_image, fps, zoom_factor,
+    border_size, border_color, slideshow_width, slideshow_height,
+    threads_per_ffmpeg, container=None, final_quality=False
+):
+    """
+    Build the ffmpeg command that encodes the Ken Burns segment for image i
+    (zoom in on even i, zoom out on odd i) into seg_path. container forces an
+    output format, which is needed when seg_path is a pipe and the format
+    cannot be sniffed from the file extension. final_quality encodes at
+    delivery settings for segments that are stream-copied into the output
+    instead of being re-encoded by a crossfade pass.
+    """
+    # Decide whether this image zooms in or out
+    if i % 2 == 0:
+        # Even => zoom in 1.0 -> zoom_factor
+        start_zoom, end_zoom = (1.0, zoom_factor)
+    else:
+        # Odd => zoom out zoom_factor -> 1.0
+        start_zoom, end_zoom = (zoom_factor, 1.0)
+
+    filter_str = build_ken_burns_filter(
+        duration=duration_per_image,
+        fps=fps,
+        start_zoom=start_zoom,
+        end_zoom=end_zoom,
+        border_size=border_size,
+        border_color=border_color,
+        slideshow_width=slideshow_width,
+        slideshow_height=slideshow_height
+    )
+
+    # Generate the segment (no fades, just pure Ken Burns movement)
+    ffmpeg_cmd = [
+        "ffmpeg",
+        "-y",
+        "-loop", "1",
+        "-t", str(duration_per_image),
+        "-i", img_path,
+        "-vf", filter_str,
+        "-r", str(fps),
+        "-c:v", "libx264",
+        "-pix_fmt", "yuv420p",
+        # Segments are normally throwaway intermediates re-encoded by the
+        # crossfade pass, so trade bits for speed: ultrafast at a generous
+        # CRF keeps them visually transparent while cutting the encode time
+        # severalfold.
+        "-preset", "medium" if final_quality else "ultrafast",
+        "-tune", "stillimage",
+        "-crf", "20" if final_quality else "18",
+        # Frame-based threading beats slice-based for non-realtime encodes.
+        "-threads", str(threads_per_ffmpeg),
+        "-x264-params", f"threads={threads_per_ffmpeg}:sliced-threads=0",
+    ]
+    if container:
+        ffmpeg_cmd += ["-f", container]
+    ffmpeg_cmd.append(seg_path)
+    return ffmpeg_cmd
+
+
+def _render_ken_burns_frames(img_path, total_frames, start_zoom, end_zoom,
+                             width, height):
+    """
+    Yield rgb24 frame bytes for a linear zoom from start_zoom to end_zoom,
+    mirroring zoompan's centered crop: at zoom z the visible region is
+    (iw/z) x (ih/z) around the image center, scaled to width x height.
+    Pillow's box-resize does the crop and scale in one step, so no
+    intermediate image is materialized per frame.
+    """
+    with Image.open(img_path) as img:
+        rgb = img.convert("RGB")
+    iw, ih = rgb.size
+    ramp_den = max(1, total_frames - 1)
+    for k in range(total_frames):
+        z = start_zoom + (end_zoom - start_zoom) * (k / ramp_den)
+        crop_w = iw / z
+        crop_h = ih / z
+        left = (iw - crop_w) / 2
+        top = (ih - crop_h) / 2
+        frame = rgb.resize(
+            (width, height), Image.BILINEAR,
+            box=(left, top, left + crop_w, top + crop_h)
+        )
+        yield frame.tobytes()
+
+
+def _rawvideo_encode_cmd(
+    source, seg_path, fps, border_size, border_color,
+    slideshow_width, slideshow_height, threads_per_ffmpeg, final_quality
+):
+    """
+    Build the ffmpeg command that encodes rgb24 rawvideo from source
+    ("-" for stdin, or a file path such as a /dev/shm buffer) into seg_path.
+    """
+    inner_w = slideshow_width - 2 * border_size
+    inner_h = slideshow_height - 2 * border_size
+    ffmpeg_cmd = [
+        "ffmpeg",
+        "-y",
+        "-f", "rawvideo",
+        "-pix_fmt", "rgb24",
+        "-s", f"{inner_w}x{inner_h}",
+        "-r", str(fps),
+        "-i", source,
+    ]
+    if border_size > 0:
+        ffmpeg_cmd += [
+            "-vf",
+            f"pad={slideshow_width}:{slideshow_height}:"
+            f"{border_size}:{border_size}:{border_color}"
+        ]
+    ffmpeg_cmd += [
+        "-c:v", "libx264",
+        "-pix_fmt", "yuv420p",
+        "-preset", "medium" if final_quality else "ultrafast",
+        "-tune", "stillimage",
+        "-crf", "20" if final_quality else "18",
+        "-threads", str(threads_per_ffmpeg),
+        "-x264-params", f"threads={threads_per_ffmpeg}:sliced-threads=0",
+        seg_path
+    ]
+    return ffmpeg_cmd
+
+
+def _encode_one_segment_raw(
+    i, img_path, tmp_dir, duration_per_image, fps, zoom_factor,
+    border_size, border_color, slideshow_width, slideshow_height,
+    threads_per_ffmpeg, final_quality=False
+):
+    """
+    Raw-frame variant of _encode_one_segment: the Ken Burns frames are
+    rendered in-process with Pillow and streamed to ffmpeg's stdin as
+    rawvideo, so ffmpeg only encodes — no -loop 1 re-decode of the source
+    image and no zoompan expression evaluation per frame.
+    """
+    seg_path = os.path.join(tmp_dir, f"segment_{i:03d}.mp4")
+
+    if i % 2 == 0:
+        start_zoom, end_zoom = (1.0, zoom_factor)
+    else:
+        start_zoom, end_zoom = (zoom_factor, 1.0)
+
+    inner_w = slideshow_width - 2 * border_size
+    inner_h = slideshow_height - 2 * border_size
+    total_frames = int(duration_per_image * fps)
+
+    ffmpeg_cmd = _rawvideo_encode_cmd(
+        "-", seg_path, fps, border_size, border_color,
+        slideshow_width, slideshow_height, threads_per_ffmpeg, final_quality
+    )
+
+    proc = subprocess.Popen(ffmpeg_cmd, stdin=subprocess.PIPE)
+    try:
+        for frame in _render_ken_burns_frames(
+            img_path, total_frames, start_zoom, end_zoom, inner_w, inner_h
+        ):
+            proc.stdin.write(frame)
+    finally:
+        proc.stdin.close()
+    if proc.wait() != 0:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
+
+    return i, seg_path, duration_per_image
+
+
+def _encode_one_segment_shm(
+    i, img_path, tmp_dir, duration_per_image, fps, zoom_factor,
+    border_size, border_color, slideshow_width, slideshow_height,
+    threads_per_ffmpeg, final_quality=False
+):
+    """
+    Zero-copy variant of _encode_one_segment_raw: the whole clip's frames
+    are written into a SharedMemory buffer and ffmpeg reads them straight
+    out of /dev/shm, so no bytes are funneled through a pipe. Falls back to
+    the stdin pipe on platforms where shared memory is not file-backed.
+    The buffer holds W x H x 3 bytes per frame, so a 1080p 3s clip at 25fps
+    needs ~0.5 GB — fine on tmpfs, but it is freed as soon as ffmpeg exits.
+    """
+    seg_path = os.path.join(tmp_dir, f"segment_{i:03d}.mp4")
+
+    if i % 2 == 0:
+        start_zoom, end_zoom = (1.0, zoom_factor)
+    else:
+        start_zoom, end_zoom = (zoom_factor, 1.0)
+
+    inner_w = slideshow_width - 2 * border_size
+    inner_h = slideshow_height - 2 * border_size
+    total_frames = int(duration_per_image * fps)
+    frame_size = inner_w * inner_h * 3
+
+    shm = shared_memory.SharedMemory(create=True, size=frame_size * total_frames)
+    try:
+        shm_path = os.path.join("/dev/shm", shm.name)
+        if not os.path.exists(shm_path):
+            # Not file-backed here (e.g. macOS): stream through stdin instead.
+            return _encode_one_segment_raw(
+                i, img_path, tmp_dir, duration_per_image, fps, zoom_factor,
+                border_size, border_color, slideshow_width, slideshow_height,
+                threads_per_ffmpeg, final_quality
+            )
+
+        offset = 0
+        for frame in _render_ken_burns_frames(
+            img_path, total_frames, start_zoom, end_zoom, inner_w, inner_h
+        ):
+            shm.buf[offset:offset + frame_size] = frame
+            offset += frame_size
+
+        ffmpeg_cmd = _rawvideo_encode_cmd(
+            shm_path, seg_path, fps, border_size, border_color,
+            slideshow_width, slideshow_height, threads_per_ffmpeg, final_quality
+        )
+        subprocess.run(ffmpeg_cmd, check=True)
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return i, seg_path, duration_per_image
+
+
+DEFAULT_CACHE_DIR = os.path.expanduser("~/.cache/slideshowmaker")
+
+
+def _segment_cache_path(cache_dir, img_path, params):
+    """
+    Cache file for a segment, keyed on the image bytes plus every parameter
+    that affects the encoded output. blake2b is noticeably faster than
+    sha256 for this and collisions only cost a wasted cache entry.
+    """
+    with open(img_path, "rb") as f:
+        img_bytes = f.read()
+    key = hashlib.blake2b(img_bytes + repr(params).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{key}.mp4")
+
+
+def _link_or_copy(src, dst):
+    """Hardlink src to dst, falling back to a copy across filesystems."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _store_segment_in_cache(seg_path, cached_path):
+    """Publish a freshly encoded segment into the cache atomically."""
+    os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+    tmp_path = cached_path + ".tmp"
+    _link_or_copy(seg_path, tmp_path)
+    os.replace(tmp_path, cached_path)
+
+
 def generate_ken_burns_segments(
     images, tmp_dir, duration_per_image, fps, zoom_factor,
-    border_size, border_color, slideshow_width, slideshow_height
+    border_size, border_color, slideshow_width, slideshow_height,
+    threads_per_ffmpeg=None, final_quality=False, segment_backend="zoompan",
+    cache_dir=None
 ):
     """
     Generate one MP4 segment per image with alternating Ken Burns zoom IN (even i)
     or zoom OUT (odd i). Returns (segment_paths, segment_lengths).
+
+    Segments are independent of each other, so they are encoded in parallel
+    with a process pool. Each ffmpeg gets threads_per_ffmpeg encoder threads
+    (computed via _ffmpeg_threads_per_invocation when None) and the pool is
+    sized so workers x threads roughly matches the CPU count.
+
+    segment_backend selects how frames are produced: "zoompan" (default)
+    lets ffmpeg's zoompan filter render them, "raw" renders them in-process
+    with Pillow and pipes rawvideo into ffmpeg, and "shm" does the same but
+    hands the frames over through a shared-memory buffer instead of a pipe.
+
+    cache_dir enables an on-disk segment cache: a segment whose image bytes
+    and encode parameters match a previous run is hardlinked (or copied)
+    from the cache instead of re-encoded, so incremental rebuilds only pay
+    for images that actually changed.
     """
+    def cached_segment(i, img_path):
+        if cache_dir is None:
+            return None
+        # Zoom direction flips with parity, so i%2 is part of the key.
+        params = (
+            i % 2, duration_per_image, fps, zoom_factor, border_size,
+            border_color, slideshow_width, slideshow_height,
+            final_quality, segment_backend
+        )
+        return _segment_cache_path(cache_dir, img_path, params)
+
+    if threads_per_ffmpeg is None:
+        max_workers = max(1, (os.cpu_count() or 1) // 2)
+        threads_per_ffmpeg = _ffmpeg_threads_per_invocation(max_workers)
+    else:
+        max_workers = max(1, (os.cpu_count() or 1) // threads_per_ffmpeg)
+
+    if segment_backend in ("raw", "shm"):
+        # Raw rendering burns CPU in Python, so it needs worker processes.
+        encode_fn = (
+            _encode_one_segment_shm if segment_backend == "shm"
+            else _encode_one_segment_raw
+        )
+        results = []
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = []
+            for i, img_path in enumerate(images):
+                cached_path = cached_segment(i, img_path)
+                if cached_path and os.path.exists(cached_path):
+                    seg_path = os.path.join(tmp_dir, f"segment_{i:03d}.mp4")
+                    _link_or_copy(cached_path, seg_path)
+                    results.append((i, seg_path, duration_per_image))
+                    continue
+                futures.append((cached_path, executor.submit(
+                    encode_fn,
+                    i, img_path, tmp_dir, duration_per_image, fps, zoom_factor,
+                    border_size, border_color, slideshow_width, slideshow_height,
+                    threads_per_ffmpeg, final_quality
+                )))
+            for cached_path, future in futures:
+                result = future.result()
+                if cached_path:
+                    _store_segment_in_cache(result[1], cached_path)
+                results.append(result)
+        results.sort()
+        segment_paths = [seg_path for _, seg_path, _ in results]
+        segment_lengths = [length for _, _, length in results]  # in seconds
+        return segment_paths, segment_lengths
+
+    # For the zoompan backend ffmpeg does all the work itself, so pool
+    # workers that just sit in subprocess.run are pure overhead. Keep a
+    # sliding window of up to max_workers Popen handles instead: command
+    # construction for segment i+K overlaps with the encodes still draining,
+    # and waiting on the oldest handle caps concurrency.
+    def drain(entry):
+        proc, seg_path, cached_path = entry
+        if proc.wait() != 0:
+            raise subprocess.CalledProcessError(proc.returncode, proc.args)
+        if cached_path:
+            _store_segment_in_cache(seg_path, cached_path)
+
+    window = deque()
     segment_paths = []
-    segment_lengths = []  # in seconds
-    
+    try:
+        for i, img_path in enumerate(images):
+            seg_path = os.path.join(tmp_dir, f"segment_{i:03d}.mp4")
+            segment_paths.append(seg_path)
+
+            cached_path = cached_segment(i, img_path)
+            if cached_path and os.path.exists(cached_path):
+                _link_or_copy(cached_path, seg_path)
+                continue
+
+            ffmpeg_cmd = _segment_encode_cmd(
+                i, img_path, seg_path, duration_per_image, fps, zoom_factor,
+                border_size, border_color, slideshow_width, slideshow_height,
+                threads_per_ffmpeg, final_quality=final_quality
+            )
+            if len(window) == max_workers:
+                drain(window.popleft())
+            window.append((subprocess.Popen(ffmpeg_cmd), seg_path, cached_path))
+        while window:
+            drain(window.popleft())
+    finally:
+        for proc, _, _ in window:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+
+    segment_lengths = [duration_per_image] * len(segment_paths)  # in seconds
+    return segment_paths, segment_lengths
+
+
+def generate_ken_burns_segment_streams(
+    images, tmp_dir, duration_per_image, fps, zoom_factor,
+    border_size, border_color, slideshow_width, slideshow_height,
+    threads_per_ffmpeg=None
+):
+    """
+    Streaming variant of generate_ken_burns_segments: every segment is a
+    named pipe (FIFO) instead of a file, so the crossfade pass reads each
+    segment while it is being encoded and no intermediate bytes touch the
+    disk. Segments are muxed as NUT because MP4 needs a seekable output.
+
+    Returns (segment_paths, segment_lengths, procs); the caller must wait on
+    the writer processes after the consuming ffmpeg has finished.
+    """
+    if threads_per_ffmpeg is None:
+        # All writers are launched at once, but pipe backpressure keeps only
+        # the couple of streams near the crossfade head actually encoding.
+        threads_per_ffmpeg = _ffmpeg_threads_per_invocation(2)
+
+    segment_paths = []
+    procs = []
     for i, img_path in enumerate(images):
-        seg_path = os.path.join(tmp_dir, f"segment_{i:03d}.mp4")
-        
-        # Decide whether this image zooms in or out
-        if i % 2 == 0:
-            # Even => zoom in 1.0 -> zoom_factor
-            start_zoom, end_zoom = (1.0, zoom_factor)
-        else:
-            # Odd => zoom out zoom_factor -> 1.0
-            start_zoom, end_zoom = (zoom_factor, 1.0)
-        
-        filter_str = build_ken_burns_filter(
-            duration=duration_per_image,
-            fps=fps,
-            start_zoom=start_zoom,
-            end_zoom=end_zoom,
-            border_size=border_size,
-            border_color=border_color,
-            slideshow_width=slideshow_width,
-            slideshow_height=slideshow_height
+        seg_path = os.path.join(tmp_dir, f"segment_{i:03d}.nut")
+        os.mkfifo(seg_path)
+        ffmpeg_cmd = _segment_encode_cmd(
+            i, img_path, seg_path, duration_per_image, fps, zoom_factor,
+            border_size, border_color, slideshow_width, slideshow_height,
+            threads_per_ffmpeg, container="nut"
         )
-        
-        # Generate the segment (no fades, just pure Ken Burns movement)
-        ffmpeg_cmd = [
-            "ffmpeg",
-            "-y",
-            "-loop", "1",
-            "-t", str(duration_per_image),
-            "-i", img_path,
-            "-vf", filter_str,
-            "-r", str(fps),
-            "-c:v", "libx264",
-            "-pix_fmt", "yuv420p",
-            seg_path
-        ]
-        subprocess.run(ffmpeg_cmd, check=True)
-        
+        procs.append(subprocess.Popen(ffmpeg_cmd))
         segment_paths.append(seg_path)
-        segment_lengths.append(duration_per_image)
-    
-    return segment_paths, segment_lengths
+
+    segment_lengths = [duration_per_image] * len(images)
+    return segment_paths, segment_lengths, procs
 
 
-def build_xfade_filter(segment_count, segment_lengths, crossfade_duration, transition="fade"):
+def build_xfade_filter(segment_count, segment_lengths, crossfade_duration,
+                       transition="fade", input_labels=None):
     """
     Build a filter_complex chain of xfade transitions among all segments.
     For N segments, we create N-1 crossfades in a chain. The final output label
     is [v(N-1)] if zero-based indexing is used (like [v1], [v2], etc.).
-    
+
+    input_labels optionally names the N streams to crossfade (e.g. ["[z0]",
+    "[z1]", ...] when chaining after other filters); the default is the raw
+    input streams ["[0:v]", "[1:v]", ...].
+
     Example for 3 segments:
       [0:v][1:v] xfade=transition=fade:duration=1:offset=2 [v1];
       [v1][2:v] xfade=transition=fade:duration=1:offset=3 [v2]
     """
+    if input_labels is None:
+        input_labels = [f"[{i}:v]" for i in range(segment_count)]
+
     if segment_count <= 1:
         # No crossfade needed or only one segment
-        return "", "[0:v]"
-    
-    lines = []
-    current_label = "[0:v]"
-    # Keep track of the total "running" length
-    total_time = segment_lengths[0]
-    
-    for i in range(1, segment_count):
-        offset = total_time - crossfade_duration
-        out_label = f"[v{i}]"
-        line = (
-            f"{current_label}[{i}:v] xfade="
-            f"transition={transition}:duration={crossfade_duration}:offset={offset}"
-            f"{out_label}"
-        )
-        lines.append(line)
-        current_label = out_label
-        
-        # Once crossfaded, the effective new total length is old total
-        # plus next segment length minus crossfade overlap
-        total_time += segment_lengths[i] - crossfade_duration
-    
+        return "", input_labels[0]
+
+    # Crossfade i starts when the running total reaches its offset: each
+    # segment extends the total by its length minus the crossfade overlap,
+    # which is a cumulative sum over the segment lengths.
+    offsets = list(itertools.accumulate(
+        segment_lengths[1:segment_count - 1],
+        lambda total, seg_len: total + seg_len - crossfade_duration,
+        initial=segment_lengths[0] - crossfade_duration
+    ))
+
+    lines = [
+        f"{input_labels[0] if i == 1 else f'[v{i - 1}]'}{input_labels[i]} xfade="
+        f"transition={transition}:duration={crossfade_duration}:offset={offsets[i - 1]}"
+        f"[v{i}]"
+        for i in range(1, segment_count)
+    ]
+
     filter_str = "; ".join(lines)
-    final_label = current_label
+    final_label = f"[v{segment_count - 1}]"
     return filter_str, final_label
 
 
@@ -199,34 +681,185 @@ def create_slideshow(
     slideshow_width=1920,
     slideshow_height=1080,
     crossfade_duration=1.0,
-    crossfade_transition="fade"
+    crossfade_transition="fade",
+    ffmpeg_threads_per_invocation=None,
+    single_pass=True,
+    stream_segments=True,
+    hw_encoder="none",
+    segment_backend="zoompan",
+    cache_dir=DEFAULT_CACHE_DIR,
+    x264_preset="medium",
+    crf=20,
+    x264_params=None
 ):
     """
     Create a Ken Burns slideshow from images with CROSSFADE transitions.
     The Ken Burns effect alternates between zoom in (on even i) and zoom out (on odd i).
+    ffmpeg_threads_per_invocation caps the encoder threads of every ffmpeg
+    process we launch; None picks a value based on the CPU count.
+
+    By default everything runs as ONE ffmpeg invocation: every image is an
+    input, each gets its own zoompan chain, and the xfade chain consumes those
+    labels directly. That skips N intermediate MP4 writes/reads and N encoder
+    inits. single_pass=False restores the two-pass segment pipeline, which
+    needs less memory for very long slideshows. In two-pass mode the
+    segment encoders and the crossfade pass overlap by default: segments
+    are streamed through named pipes and consumed as they are encoded, so
+    the two stages pipeline instead of running back to back.
+    stream_segments=False writes real intermediate files instead, which is
+    what lets the segment cache apply. hw_encoder
+    ("none"/"auto"/"vaapi"/"nvenc"/"qsv") offloads the final encode to a
+    fixed-function media engine when the local ffmpeg supports it, and
+    segment_backend ("zoompan"/"raw") selects between ffmpeg's zoompan filter
+    and in-process Pillow rendering for two-pass segments. cache_dir holds
+    reusable encoded segments across runs (None disables the cache).
+    x264_preset and crf set the speed/size tradeoff of the final libx264
+    encode, and x264_params overrides its full -x264-params string.
     """
-    
+
     # Gather / sort images
     images = get_image_file_list(images_dir, order_file)
     if not images:
         print("No images found in", images_dir)
         return
-    
+
+    # The final pass runs alone, so let libx264 pick its own (frame-based)
+    # thread count unless the caller pinned one explicitly.
+    final_threads = ffmpeg_threads_per_invocation
+
+    # Hard cuts need no blending at all: encode the segments once at
+    # delivery quality and stitch them with the concat demuxer under
+    # -c:v copy, skipping the final encode entirely.
+    if crossfade_transition == "cut" or crossfade_duration <= 0:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            segment_paths, _ = generate_ken_burns_segments(
+                images=images,
+                tmp_dir=tmp_dir,
+                duration_per_image=duration_per_image,
+                fps=fps,
+                zoom_factor=zoom_factor,
+                border_size=border_size,
+                border_color=border_color,
+                slideshow_width=slideshow_width,
+                slideshow_height=slideshow_height,
+                threads_per_ffmpeg=ffmpeg_threads_per_invocation,
+                final_quality=True,
+                segment_backend=segment_backend,
+                cache_dir=cache_dir
+            )
+            concat_list = os.path.join(tmp_dir, "concat_list.txt")
+            with open(concat_list, "w", encoding="utf-8") as f:
+                for seg_path in segment_paths:
+                    f.write(f"file '{seg_path}'\n")
+            ffmpeg_cmd = [
+                "ffmpeg",
+                "-y",
+                "-f", "concat",
+                "-safe", "0",
+                "-i", concat_list,
+                "-c:v", "copy",
+                output_file
+            ]
+            subprocess.run(ffmpeg_cmd, check=True)
+        print(f"Slideshow created with hard cuts (stream copy): {output_file}")
+        return
+
+    if single_pass:
+        # One input per image; -framerate makes zoompan's frame count line up
+        # with the requested fps without an output -r resample.
+        ffmpeg_cmd = ["ffmpeg", "-y"]
+        for img_path in images:
+            ffmpeg_cmd += [
+                "-loop", "1",
+                "-framerate", str(fps),
+                "-t", str(duration_per_image),
+                "-i", img_path
+            ]
+
+        # Per-input Ken Burns chains: [k:v] -> [zk]. Only two distinct
+        # filters exist (zoom in on even k, zoom out on odd k), so build
+        # them once and select by parity.
+        kb_filters = tuple(
+            build_ken_burns_filter(
+                duration=duration_per_image,
+                fps=fps,
+                start_zoom=start_zoom,
+                end_zoom=end_zoom,
+                border_size=border_size,
+                border_color=border_color,
+                slideshow_width=slideshow_width,
+                slideshow_height=slideshow_height
+            )
+            for start_zoom, end_zoom in ((1.0, zoom_factor), (zoom_factor, 1.0))
+        )
+        zoom_labels = []
+        filter_parts = []
+        for k in range(len(images)):
+            filter_parts.append(f"[{k}:v]{kb_filters[k % 2]}[z{k}]")
+            zoom_labels.append(f"[z{k}]")
+
+        xfade_filter_str, final_label = build_xfade_filter(
+            segment_count=len(images),
+            segment_lengths=[duration_per_image] * len(images),
+            crossfade_duration=crossfade_duration,
+            transition=crossfade_transition,
+            input_labels=zoom_labels
+        )
+        filter_complex = "; ".join(filter_parts)
+        if xfade_filter_str:
+            filter_complex += "; " + xfade_filter_str
+
+        extra_filter, codec_args = _final_encode_args(final_threads, hw_encoder,
+                                                      x264_preset, crf,
+                                                      x264_params)
+        if extra_filter:
+            filter_complex += f"; {final_label}{extra_filter}[hwout]"
+            final_label = "[hwout]"
+
+        ffmpeg_cmd += [
+            "-filter_complex", filter_complex,
+            "-map", final_label,
+        ] + codec_args + [output_file]
+        subprocess.run(ffmpeg_cmd, check=True)
+        print(f"Slideshow created with alternating zoom-in/out crossfades: {output_file}")
+        return
+
     # Make a temp folder for intermediate clips
     with tempfile.TemporaryDirectory() as tmp_dir:
-        # STEP 1: Generate Ken Burns segments, toggling zoom in/out
-        segment_paths, segment_lengths = generate_ken_burns_segments(
-            images=images,
-            tmp_dir=tmp_dir,
-            duration_per_image=duration_per_image,
-            fps=fps,
-            zoom_factor=zoom_factor,
-            border_size=border_size,
-            border_color=border_color,
-            slideshow_width=slideshow_width,
-            slideshow_height=slideshow_height
-        )
-        
+        # STEP 1: Generate Ken Burns segments, toggling zoom in/out.
+        # A single image still needs a real file (it is renamed below), so
+        # streaming only applies when there is something to crossfade; the
+        # raw backend renders in-process and always goes through files.
+        segment_procs = []
+        if stream_segments and len(images) > 1 and segment_backend == "zoompan":
+            segment_paths, segment_lengths, segment_procs = generate_ken_burns_segment_streams(
+                images=images,
+                tmp_dir=tmp_dir,
+                duration_per_image=duration_per_image,
+                fps=fps,
+                zoom_factor=zoom_factor,
+                border_size=border_size,
+                border_color=border_color,
+                slideshow_width=slideshow_width,
+                slideshow_height=slideshow_height,
+                threads_per_ffmpeg=ffmpeg_threads_per_invocation
+            )
+        else:
+            segment_paths, segment_lengths = generate_ken_burns_segments(
+                images=images,
+                tmp_dir=tmp_dir,
+                duration_per_image=duration_per_image,
+                fps=fps,
+                zoom_factor=zoom_factor,
+                border_size=border_size,
+                border_color=border_color,
+                slideshow_width=slideshow_width,
+                slideshow_height=slideshow_height,
+                threads_per_ffmpeg=ffmpeg_threads_per_invocation,
+                segment_backend=segment_backend,
+                cache_dir=cache_dir
+            )
+
         # If there's only one segment, skip crossfading
         if len(segment_paths) == 1:
             os.rename(segment_paths[0], output_file)
@@ -250,13 +883,16 @@ def create_slideshow(
             ffmpeg_cmd += ["-i", seg_path]
         
         if xfade_filter_str:
+            extra_filter, codec_args = _final_encode_args(final_threads, hw_encoder,
+                                                          x264_preset, crf,
+                                                          x264_params)
+            if extra_filter:
+                xfade_filter_str += f"; {final_label}{extra_filter}[hwout]"
+                final_label = "[hwout]"
             ffmpeg_cmd += [
                 "-filter_complex", xfade_filter_str,
                 "-map", final_label,
-                "-c:v", "libx264",
-                "-pix_fmt", "yuv420p",
-                output_file
-            ]
+            ] + codec_args + [output_file]
         else:
             # Just copy if no crossfade filter
             ffmpeg_cmd += [
@@ -264,14 +900,30 @@ def create_slideshow(
                 output_file
             ]
         
-        subprocess.run(ffmpeg_cmd, check=True)
+        try:
+            subprocess.run(ffmpeg_cmd, check=True)
+            for proc in segment_procs:
+                if proc.wait() != 0:
+                    raise subprocess.CalledProcessError(proc.returncode, proc.args)
+        finally:
+            # If the crossfade pass died, the fifo writers would block on a
+            # full pipe forever; make sure they are gone before cleanup.
+            for proc in segment_procs:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
         print(f"Slideshow created with alternating zoom-in/out crossfades: {output_file}")
 
 
 if __name__ == "__main__":
     import argparse
     
-    parser = argparse.ArgumentParser(description="Create a Ken Burns slideshow with CROSSFADE transitions, alternating zoom in/out.")
+    parser = argparse.ArgumentParser(
+        description="Create a Ken Burns slideshow with CROSSFADE transitions, alternating zoom in/out.",
+        epilog="The final encode defaults to libx264 frame-based threading "
+               "(sliced-threads=0), which outperforms slice threading for "
+               "non-realtime encodes; use --x264_params to override."
+    )
     parser.add_argument("--images_dir", required=True, help="Path to the folder of images.")
     parser.add_argument("--order_file", default=None, help="Optional text file specifying image order.")
     parser.add_argument("--output_file", default="slideshow.mp4", help="Output video filename.")
@@ -286,6 +938,45 @@ if __name__ == "__main__":
                         help="Duration (seconds) of the crossfade between clips.")
     parser.add_argument("--crossfade_transition", default="fade",
                         help="Transition type for xfade (e.g. 'fade', 'wipeleft', 'circlecrop', etc.).")
+    _env_threads = os.environ.get("SLIDESHOW_FFMPEG_THREADS")
+    parser.add_argument("--ffmpeg_threads_per_invocation", type=int,
+                        default=int(_env_threads) if _env_threads else None,
+                        help="Encoder threads per ffmpeg process (default: derived from CPU count, "
+                             "or the SLIDESHOW_FFMPEG_THREADS environment variable).")
+    parser.add_argument("--two_pass", action="store_true",
+                        help="Encode one intermediate MP4 per image before crossfading instead of "
+                             "running a single filter_complex graph (uses less memory for very "
+                             "long slideshows).")
+    parser.add_argument("--stream_segments", action="store_true",
+                        help="Stream segments to the crossfade pass through named pipes so the "
+                             "two stages overlap (implies --two_pass; this is already the default "
+                             "behavior of two-pass mode).")
+    parser.add_argument("--no_stream_segments", action="store_true",
+                        help="In two-pass mode, write segments to temp files instead of streaming "
+                             "them through named pipes (required for the segment cache to apply).")
+    parser.add_argument("--hw_encoder", default="none",
+                        choices=["none", "auto", "vaapi", "nvenc", "qsv"],
+                        help="Hardware encoder for the final pass ('auto' probes ffmpeg and picks "
+                             "the first available; falls back to libx264).")
+    parser.add_argument("--segment_backend", default="zoompan",
+                        choices=["zoompan", "raw", "shm"],
+                        help="How Ken Burns frames are rendered in two-pass mode: ffmpeg's zoompan "
+                             "filter, in-process Pillow rendering piped to ffmpeg as rawvideo, or "
+                             "the same via a zero-copy shared-memory buffer ('raw'/'shm' imply "
+                             "--two_pass).")
+    parser.add_argument("--x264_preset", default="medium",
+                        help="libx264 preset for the final encode (e.g. 'ultrafast' for speed, "
+                             "'slow' for size).")
+    parser.add_argument("--crf", type=int, default=20,
+                        help="libx264 CRF for the final encode (lower = higher quality).")
+    parser.add_argument("--x264_params", default=None,
+                        help="Override the -x264-params string of the final encode "
+                             "(default: threads=auto:sliced-threads=0:lookahead-threads=2:"
+                             "rc-lookahead=40).")
+    parser.add_argument("--cache_dir", default=DEFAULT_CACHE_DIR,
+                        help="Directory for reusable encoded segments across runs.")
+    parser.add_argument("--no_cache", action="store_true",
+                        help="Disable the on-disk segment cache.")
     args = parser.parse_args()
     
     create_slideshow(
@@ -300,5 +991,15 @@ if __name__ == "__main__":
         slideshow_width=args.slideshow_width,
         slideshow_height=args.slideshow_height,
         crossfade_duration=args.crossfade_duration,
-        crossfade_transition=args.crossfade_transition
+        crossfade_transition=args.crossfade_transition,
+        ffmpeg_threads_per_invocation=args.ffmpeg_threads_per_invocation,
+        single_pass=not (args.two_pass or args.stream_segments
+                         or args.segment_backend != "zoompan"),
+        stream_segments=args.stream_segments or not args.no_stream_segments,
+        hw_encoder=args.hw_encoder,
+        segment_backend=args.segment_backend,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        x264_preset=args.x264_preset,
+        crf=args.crf,
+        x264_params=args.x264_params
     )